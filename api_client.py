@@ -0,0 +1,183 @@
+import json
+import threading
+from collections import OrderedDict
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import BASE_API_URL
+
+# (connect, read) timeouts in seconds; AI endpoints pass a longer read timeout
+DEFAULT_TIMEOUT = (5, 30)
+LLM_TIMEOUT = (5, 180)
+# How long cached_get may serve a user's data without asking the API
+CACHE_TTL_SECONDS = 300
+# Most responses conditional_get keeps for revalidation, least recently used dropped first
+ETAG_STORE_MAX_ENTRIES = 256
+
+
+@st.cache_resource
+def get_session():
+    """
+    One keep-alive session per Streamlit server process, so reruns reuse pooled
+    TCP/TLS connections to the API instead of opening a new one per call.
+    Idempotent requests are retried with backoff on connection errors and 502-504;
+    once retries run out, the last 5xx response is returned rather than raised.
+    """
+    session = requests.Session()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=["GET", "HEAD", "PUT", "DELETE", "OPTIONS"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=20, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    return session
+
+
+def _with_auth(headers):
+    token = st.session_state.get("access_token")
+    return {**(headers or {}), "Authorization": f"Bearer {token}"} if token else headers
+
+
+def refresh_access_token():
+    """
+    Swap the stored refresh token for a new token pair. If the API rejects the
+    refresh token, the user is logged out and the script reruns into the login page;
+    False if there is no refresh token or the API could not answer.
+    """
+    refresh_token = st.session_state.get("refresh_token")
+    if not refresh_token:
+        return False
+    response = get_session().post(
+        f"{BASE_API_URL}/token/refresh", json={"refresh_token": refresh_token}, timeout=DEFAULT_TIMEOUT
+    )
+    if response.status_code == 401:
+        for key in ("user_id", "username", "access_token", "refresh_token"):
+            st.session_state[key] = None
+        st.rerun()
+    if response.status_code != 200:
+        return False
+    tokens = response.json()
+    st.session_state["access_token"] = tokens["access_token"]
+    st.session_state["refresh_token"] = tokens["refresh_token"]
+    return True
+
+
+def request(method, url, headers=None, **kwargs):
+    """Send an authenticated request, refreshing the access token once on 401."""
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    response = get_session().request(method, url, headers=_with_auth(headers), **kwargs)
+    if response.status_code == 401 and refresh_access_token():
+        response = get_session().request(method, url, headers=_with_auth(headers), **kwargs)
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+@st.cache_resource
+def _etag_store():
+    """
+    (ETag, CachedResponse) of the last ETag'd response per (url, params), shared
+    by all sessions of this process and capped at ETAG_STORE_MAX_ENTRIES.
+    """
+    return {"lock": threading.Lock(), "entries": OrderedDict()}
+
+
+@st.cache_resource
+def _data_versions():
+    """Per-user data version counters, shared by all sessions of this process."""
+    return {"lock": threading.Lock(), "versions": {}}
+
+
+class CachedResponse:
+    """Picklable snapshot of a response (status code and body) for st.cache_data and conditional_get."""
+
+    def __init__(self, status_code, text):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def conditional_get(url, params=None):
+    """
+    GET that revalidates against the last response for the same URL and params.
+    The API answers 304 Not Modified when the user's data hasn't changed, in
+    which case the previously stored response is returned instead, as a
+    CachedResponse.
+    """
+    store = _etag_store()
+    key = (url, tuple(sorted((params or {}).items())))
+    with store["lock"]:
+        cached = store["entries"].get(key)
+        if cached is not None:
+            store["entries"].move_to_end(key)
+
+    headers = {"If-None-Match": cached[0]} if cached is not None else {}
+    response = get(url, params=params, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        return cached[1]
+
+    with store["lock"]:
+        if response.status_code == 200 and "ETag" in response.headers:
+            store["entries"][key] = (response.headers["ETag"], CachedResponse(response.status_code, response.text))
+            store["entries"].move_to_end(key)
+            while len(store["entries"]) > ETAG_STORE_MAX_ENTRIES:
+                store["entries"].popitem(last=False)
+        else:
+            store["entries"].pop(key, None)
+    return response
+
+
+def data_version(user_id):
+    return _data_versions()["versions"].get(user_id, 0)
+
+
+def invalidate(user_id):
+    """Call after any write for user_id so cached_get stops serving the old data."""
+    state = _data_versions()
+    with state["lock"]:
+        state["versions"][user_id] = state["versions"].get(user_id, 0) + 1
+
+
+class UncacheableResponse(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def _cached_fetch(url, params, user_id, version):
+    response = conditional_get(url, dict(params))
+    if response.status_code not in (200, 404):
+        # Raising keeps errors out of the cache
+        raise UncacheableResponse(response)
+    return CachedResponse(response.status_code, response.text)
+
+
+def cached_get(url, user_id, params=None):
+    """
+    Read a user's data without a network call when this process already has it
+    for the user's current data version. invalidate(user_id) after a write moves
+    the version on; entries also expire after CACHE_TTL_SECONDS to pick up
+    writes made elsewhere. Misses fall through to conditional_get.
+    """
+    try:
+        return _cached_fetch(url, tuple(sorted((params or {}).items())), user_id, data_version(user_id))
+    except UncacheableResponse as e:
+        return e.response
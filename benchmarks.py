@@ -0,0 +1,854 @@
+"""
+Benchmarks and load tests for the Food Macro Tracker API.
+
+Run `python benchmarks.py <command> --help` for the options of each command.
+
+Load test for /foods/{user_id} latency under concurrent /generate_meal/ traffic:
+> python migrate.py
+> python benchmarks.py fake-openai --port 9000 --latency 3
+> OPENAI_API_KEY=dummy OPENAI_BASE_URL=http://127.0.0.1:9000/v1 uvicorn food_macros_api:app --port 8000
+> python benchmarks.py load --url http://127.0.0.1:8000
+
+The fake server exercises the real OpenAI client over HTTP. To run fully offline,
+use the in-process fake provider instead; with zero latency, the endpoint timings
+are the API's own overhead:
+> LLM_PROVIDER=fake LLM_FAKE_LATENCY_SECONDS=0 uvicorn food_macros_api:app --port 8000
+
+Time to first meal of /generate_meal/stream vs. the full /generate_meal/ plan
+(same fake server and API as above):
+> python benchmarks.py stream --url http://127.0.0.1:8000
+
+Per-user query latency on a seeded SQLite database, before and after migrate_schema:
+> python benchmarks.py indexes --rows 1000000
+
+Bulk food import of 10k CSV rows against a running API:
+> python benchmarks.py import --url http://127.0.0.1:8000 --rows 10000
+
+Login throughput and /foods latency during a login storm:
+> python benchmarks.py login --url http://127.0.0.1:8000 --concurrency 32
+
+Concurrent writes and reads on the SQLite database, next to a slowly streamed bulk import
+(status counts show lock errors as 500s):
+> python benchmarks.py writes --url http://127.0.0.1:8000 --writers 16 --readers 16 --importers 1
+
+The same mix against 1 and 4 API workers on a fresh SQLite file and on an embedded
+PostgreSQL server (pip install pgserver); the API processes are started by the benchmark:
+> python benchmarks.py workers --backends sqlite postgres --workers 1 4
+
+One-shot LLM plan vs. locally solved plan with per-meal instructions in parallel
+(fake server latency growing with completion length):
+> python benchmarks.py fake-openai --port 9000 --latency 0.5 --per-kchar 2
+> python benchmarks.py plan --url http://127.0.0.1:8000
+
+Concurrent lookups of the same new food share one LLM call (ADMIN_TOKEN set on the API):
+> python benchmarks.py coalesce --url http://127.0.0.1:8000 --fan-in 20 --admin-token <token>
+
+Ten new foods looked up one by one vs. in one batch request:
+> python benchmarks.py batch --url http://127.0.0.1:8000 --foods 10
+
+Typeahead search over the bundled food reference, in process and over HTTP:
+> python benchmarks.py search --url http://127.0.0.1:8000
+
+Requests per second of small CRUD reads through one worker's event loop, in process
+(a fresh SQLite file unless DATABASE_URL is set):
+> python benchmarks.py crud --requests 5000 --concurrency 64
+
+Prompt size of a large food list, as previously sent vs. compacted (offline):
+> python benchmarks.py prompt --foods 500
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from llm_providers import canned_completion
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def print_latencies(label, samples):
+    print(
+        f"{label}: n={len(samples)} "
+        f"p50={percentile(samples, 50) * 1000:.1f}ms "
+        f"p99={percentile(samples, 99) * 1000:.1f}ms "
+        f"max={max(samples, default=0) * 1000:.1f}ms"
+    )
+
+
+BENCH_PASSWORD = "correct horse battery staple"
+
+
+def login_bench_user(url):
+    """Register a throwaway user and return (session sending its access token, user_id, username)."""
+    username = f"bench-{random.randint(10**6, 10**7)}"
+    requests.post(f"{url}/register/", json={"username": username, "password": BENCH_PASSWORD}, timeout=60)
+    resp = requests.post(f"{url}/login/", json={"username": username, "password": BENCH_PASSWORD}, timeout=60)
+    resp.raise_for_status()
+    tokens = resp.json()
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {tokens['access_token']}"
+    return session, tokens["id"], username
+
+
+### Fake OpenAI server: answers chat completions with llm_providers' canned JSON after a fixed delay
+def make_fake_openai_handler(latency, per_kchar=0.0):
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            content, usage = canned_completion(body.get("messages", []))
+            if body.get("stream"):
+                include_usage = (body.get("stream_options") or {}).get("include_usage")
+                self.stream_completion(content, body.get("model", "fake"), usage if include_usage else None)
+                return
+            time.sleep(latency + per_kchar * len(content) / 1000)
+            payload = json.dumps({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }],
+                "usage": usage,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def stream_completion(self, text, model, usage=None):
+            # Spread the configured latency evenly over ~20-character deltas (SSE framing)
+            deltas = [text[i:i + 20] for i in range(0, len(text), 20)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for delta in deltas:
+                time.sleep((latency + per_kchar * len(text) / 1000) / len(deltas))
+                chunk = {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+            if usage:
+                chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model, "choices": [], "usage": usage}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeOpenAIHandler
+
+
+def run_fake_openai(args):
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_fake_openai_handler(args.latency, args.per_kchar))
+    print(f"Fake OpenAI listening on http://127.0.0.1:{args.port}/v1 "
+          f"(latency {args.latency}s + {args.per_kchar}s per 1000 completion chars)")
+    server.serve_forever()
+
+
+### Load test: p99 of a cheap CRUD read while LLM-backed requests are in flight
+def run_load(args):
+    session, user_id, _ = login_bench_user(args.url)
+    stop = threading.Event()
+    llm_statuses = []
+
+    def llm_worker():
+        while not stop.is_set():
+            try:
+                resp = session.post(
+                    f"{args.url}/generate_meal/",
+                    json={"prompt": "Generate 1 meal.", "use_food_list": False, "regenerate": True},
+                    timeout=120,
+                )
+                llm_statuses.append(resp.status_code)
+            except requests.exceptions.RequestException:
+                llm_statuses.append(None)
+
+    def sample_foods(session):
+        start = time.perf_counter()
+        session.get(f"{args.url}/foods/{user_id}", timeout=120)
+        return time.perf_counter() - start
+
+    baseline = [sample_foods(session) for _ in range(args.samples)]
+    print_latencies("/foods idle", baseline)
+
+    with ThreadPoolExecutor(max_workers=args.llm_concurrency) as pool:
+        for _ in range(args.llm_concurrency):
+            pool.submit(llm_worker)
+        time.sleep(args.warmup)
+        loaded = []
+        deadline = time.time() + args.duration
+        while time.time() < deadline:
+            loaded.append(sample_foods(session))
+        stop.set()
+
+    print_latencies(f"/foods with {args.llm_concurrency} concurrent /generate_meal/", loaded)
+    if loaded and baseline:
+        print(f"mean slowdown: {statistics.mean(loaded) / statistics.mean(baseline):.1f}x")
+    print(f"/generate_meal/ responses: {len(llm_statuses)} "
+          f"(status counts: { {s: llm_statuses.count(s) for s in set(llm_statuses)} })")
+
+
+### Streaming: time to first meal vs. full plan
+def run_stream(args):
+    session, _, _ = login_bench_user(args.url)
+    # regenerate skips the meal plan cache, so every run reaches the model
+    body = {"prompt": "Generate 4 meals.", "use_food_list": False, "regenerate": True}
+    full = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        session.post(f"{args.url}/generate_meal/", json=body, timeout=120)
+        full.append(time.perf_counter() - start)
+    print_latencies("/generate_meal/ full plan", full)
+
+    first_meal, done = [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        with session.post(f"{args.url}/generate_meal/stream", json=body, stream=True, timeout=120) as resp:
+            for line in resp.iter_lines():
+                event = json.loads(line)
+                if event["type"] == "meal" and len(first_meal) < len(done) + 1:
+                    first_meal.append(time.perf_counter() - start)
+        done.append(time.perf_counter() - start)
+    print_latencies("/generate_meal/stream first meal", first_meal)
+    print_latencies("/generate_meal/stream full plan", done)
+
+
+### Indexes: hot per-user queries on a large legacy (index-free) database, then migrated
+LEGACY_SCHEMA = """
+CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL UNIQUE, hashed_password VARCHAR NOT NULL);
+CREATE TABLE foods (id INTEGER PRIMARY KEY, user_id INTEGER, name VARCHAR NOT NULL, calories FLOAT NOT NULL,
+    protein FLOAT NOT NULL, carbs FLOAT NOT NULL, fats FLOAT NOT NULL);
+CREATE TABLE meals (id INTEGER PRIMARY KEY, user_id INTEGER, meal_name VARCHAR NOT NULL, food_name VARCHAR NOT NULL,
+    grams FLOAT NOT NULL, protein FLOAT NOT NULL, carbs FLOAT NOT NULL, fats FLOAT NOT NULL);
+CREATE TABLE daily_macros (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, date VARCHAR NOT NULL,
+    protein FLOAT NOT NULL, carbs FLOAT NOT NULL, fats FLOAT NOT NULL, calories FLOAT NOT NULL);
+"""
+
+
+def seed_legacy_db(path, rows, users):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", ((u, f"user{u}", "x") for u in range(1, users + 1)))
+    per_user = max(1, rows // users)
+    conn.executemany(
+        "INSERT INTO foods (user_id, name, calories, protein, carbs, fats) VALUES (?, ?, 100, 10, 10, 1)",
+        ((i % users + 1, f"food {i // users}") for i in range(rows)),
+    )
+    conn.executemany(
+        "INSERT INTO meals (user_id, meal_name, food_name, grams, protein, carbs, fats) VALUES (?, ?, ?, 100, 10, 10, 1)",
+        ((i % users + 1, f"meal {i // users // 4}", f"food {i // users % per_user}") for i in range(rows)),
+    )
+    conn.executemany(
+        "INSERT INTO daily_macros (user_id, date, protein, carbs, fats, calories) VALUES (?, ?, 100, 200, 50, 1650)",
+        ((i % users + 1, f"day {i // users:05d}") for i in range(rows)),
+    )
+    conn.commit()
+    conn.close()
+
+
+def time_user_queries(api, session_factory, users, repeats):
+    rng = random.Random(0)
+    timings = {}
+    queries = {
+        "get_foods": lambda db, u: db.query(api.Food).filter(api.Food.user_id == u).all(),
+        "delete_food lookup": lambda db, u: db.query(api.Food).filter(api.Food.user_id == u, api.Food.name == "food 3").first(),
+        "get_meal_names": lambda db, u: db.query(api.Meal.meal_name).filter(api.Meal.user_id == u).distinct().all(),
+        "get_meal_by_name": lambda db, u: db.query(api.Meal).filter(api.Meal.user_id == u, api.Meal.meal_name == "meal 2").all(),
+        "list_user_days": lambda db, u: db.query(api.DailyMacro).filter(api.DailyMacro.user_id == u).all(),
+    }
+    for name, query in queries.items():
+        samples = []
+        for _ in range(repeats):
+            user_id = rng.randint(1, users)
+            db = session_factory()
+            start = time.perf_counter()
+            query(db, user_id)
+            samples.append(time.perf_counter() - start)
+            db.close()
+        timings[name] = samples
+    return timings
+
+
+def run_indexes(args):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    import food_macros_api as api
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        seed_legacy_db(path, args.rows, args.users)
+        print(f"seeded {args.rows} rows per table for {args.users} users in {time.perf_counter() - start:.1f}s")
+
+        engine = create_engine(f"sqlite:///{path}")
+        session_factory = sessionmaker(bind=engine)
+        before = time_user_queries(api, session_factory, args.users, args.repeats)
+
+        start = time.perf_counter()
+        api.migrate_schema(engine)
+        print(f"migrate_schema took {time.perf_counter() - start:.1f}s")
+        after = time_user_queries(api, session_factory, args.users, args.repeats)
+
+        for name in before:
+            print_latencies(f"{name:20s} before", before[name])
+            print_latencies(f"{name:20s} after ", after[name])
+        engine.dispose()
+
+
+### Bulk import: one streamed CSV upload instead of one POST per food
+def run_import(args):
+    session, user_id, _ = login_bench_user(args.url)
+    body = "name,calories,protein,carbs,fats\n" + "".join(
+        f"bench food {i},{100 + i % 300},{i % 30},{i % 60},{i % 20}\n" for i in range(args.rows)
+    )
+    start = time.perf_counter()
+    resp = session.post(
+        f"{args.url}/foods/{user_id}/import", params={"format": "csv"}, data=body.encode(), timeout=600
+    )
+    elapsed = time.perf_counter() - start
+    print(f"import of {args.rows} rows for user {user_id}: {elapsed * 1000:.0f}ms -> {resp.json()}")
+
+
+### Login storm: bcrypt-heavy logins next to cheap reads
+def run_login(args):
+    session, user_id, username = login_bench_user(args.url)
+
+    stop = threading.Event()
+    login_statuses = []
+
+    def login_worker():
+        session = requests.Session()
+        while not stop.is_set():
+            try:
+                resp = session.post(
+                    f"{args.url}/login/", json={"username": username, "password": BENCH_PASSWORD}, timeout=120
+                )
+                login_statuses.append(resp.status_code)
+                if resp.status_code == 429:
+                    time.sleep(float(resp.headers.get("Retry-After", 1)))
+            except requests.exceptions.RequestException:
+                login_statuses.append(None)
+
+    def sample_foods():
+        start = time.perf_counter()
+        session.get(f"{args.url}/foods/{user_id}", timeout=120)
+        return time.perf_counter() - start
+
+    baseline = [sample_foods() for _ in range(args.samples)]
+    print_latencies("/foods idle", baseline)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _ in range(args.concurrency):
+            pool.submit(login_worker)
+        time.sleep(args.warmup)
+        started_with = len(login_statuses)
+        loaded = []
+        start = time.time()
+        while time.time() - start < args.duration:
+            loaded.append(sample_foods())
+        logins = login_statuses[started_with:]
+        stop.set()
+
+    print_latencies(f"/foods during {args.concurrency} concurrent logins", loaded)
+    print(f"logins: {len(logins) / args.duration:.1f}/s "
+          f"(status counts: { {s: logins.count(s) for s in set(logins)} })")
+
+
+### Concurrent writes: throughput and lock errors with readers and writers on the same SQLite file
+def run_writes(args):
+    users = [login_bench_user(args.url)[:2] for _ in range(args.users)]
+    for session, user_id in users:
+        session.post(f"{args.url}/foods/{user_id}", json={
+            "name": "oats", "calories": 379, "protein": 13.2, "carbs": 67.7, "fats": 6.5
+        }, timeout=60)
+
+    stop = threading.Event()
+    writes, reads, imports = [], [], []
+
+    def writer(number):
+        session, user_id = users[number % len(users)]
+        rng = random.Random(number)
+        while not stop.is_set():
+            date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.5:
+                    resp = session.post(f"{args.url}/user_daily_macros/{user_id}", json={
+                        "date": date, "protein": 150, "carbs": 250, "fats": 70, "calories": 2230
+                    }, timeout=60)
+                else:
+                    resp = session.post(f"{args.url}/food_log/{user_id}", json=[
+                        {"food_name": "oats", "grams": 80, "date": date}
+                    ], timeout=60)
+                status = resp.status_code
+            except requests.exceptions.RequestException:
+                status = None
+            writes.append((time.perf_counter() - start, status))
+
+    def importer(number):
+        # Slow uploads: the body trickles in over --upload-seconds while the writers keep going
+        session, user_id = users[number % len(users)]
+        batch = 0
+        while not stop.is_set():
+            def body(prefix=f"import {number}-{batch}"):
+                yield b"name,calories,protein,carbs,fats\n"
+                for chunk in range(10):
+                    time.sleep(args.upload_seconds / 10)
+                    yield "".join(
+                        f"{prefix}-{i},100,10,10,5\n" for i in range(chunk, args.import_rows, 10)
+                    ).encode()
+            start = time.perf_counter()
+            try:
+                resp = session.post(
+                    f"{args.url}/foods/{user_id}/import", params={"format": "csv"}, data=body(), timeout=120
+                )
+                status = resp.status_code
+            except requests.exceptions.RequestException:
+                status = None
+            imports.append((time.perf_counter() - start, status))
+            batch += 1
+
+    def reader(number):
+        session, user_id = users[number % len(users)]
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                resp = session.get(f"{args.url}/food_log/{user_id}/totals", params={"period": "week"}, timeout=60)
+                status = resp.status_code
+            except requests.exceptions.RequestException:
+                status = None
+            reads.append((time.perf_counter() - start, status))
+
+    with ThreadPoolExecutor(max_workers=args.writers + args.readers + args.importers) as pool:
+        for number in range(args.writers):
+            pool.submit(writer, number)
+        for number in range(args.readers):
+            pool.submit(reader, number)
+        for number in range(args.importers):
+            pool.submit(importer, number)
+        time.sleep(args.duration)
+        stop.set()
+
+    for label, samples in [("writes", writes), ("reads", reads), ("imports", imports)]:
+        if not samples:
+            continue
+        statuses = [status for _, status in samples]
+        print_latencies(f"{label} ({len(samples) / args.duration:.0f}/s)", [t for t, _ in samples])
+        print(f"  status counts: { {s: statuses.count(s) for s in set(statuses)} }")
+    if args.admin_token:
+        metrics = requests.get(f"{args.url}/admin/metrics", headers={"X-Admin-Token": args.admin_token}, timeout=30)
+        if metrics.ok and metrics.json().get("write_queue"):
+            print(f"write queue: {metrics.json()['write_queue']}")
+
+
+### Workers: the writes benchmark against API processes started here, per database and worker count
+def embedded_postgres(workdir):
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("The postgres backend needs an embedded server: pip install pgserver")
+    return pgserver.get_server(os.path.join(workdir, "pgdata"), cleanup_mode="stop")
+
+
+def run_workers(args):
+    port = args.port
+    with tempfile.TemporaryDirectory() as workdir:
+        postgres = embedded_postgres(workdir) if "postgres" in args.backends else None
+        try:
+            for backend in args.backends:
+                for workers in args.workers:
+                    name = f"bench_{backend}_{workers}"
+                    if backend == "sqlite":
+                        database_url = f"sqlite:///{os.path.join(workdir, name)}.db"
+                    else:
+                        postgres.psql(f"CREATE DATABASE {name};")
+                        database_url = postgres.get_uri(name)
+                    print(f"--- {backend}, {workers} worker{'s' if workers > 1 else ''}")
+                    run_workers_once(args, database_url, workers, port)
+                    port += 1
+        finally:
+            if postgres is not None:
+                postgres.cleanup()
+
+
+def run_workers_once(args, database_url, workers, port):
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "LLM_PROVIDER": "fake",
+        "TOKEN_SECRET": "benchmark",
+        "ADMIN_TOKEN": "benchmark",
+        "BCRYPT_ROUNDS": "4",
+    }
+    subprocess.run([sys.executable, "migrate.py"], env=env, check=True, stdout=subprocess.DEVNULL)
+    api = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "food_macros_api:app",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        while api.poll() is None:
+            try:
+                requests.get(url, timeout=1)
+                break
+            except requests.exceptions.RequestException:
+                time.sleep(0.5)
+        if api.poll() is not None:
+            raise SystemExit(f"The API on port {port} failed to start")
+        # Write queue counters are per process, so they are only meaningful with one worker
+        run_writes(argparse.Namespace(
+            url=url, writers=args.writers, readers=args.readers, users=args.users,
+            duration=args.duration, admin_token="benchmark" if workers == 1 else None,
+            importers=0, import_rows=0, upload_seconds=0,
+        ))
+    finally:
+        api.terminate()
+        api.wait()
+
+
+### Meal plans: one LLM completion for the whole plan vs. local solve + parallel per-meal instructions
+BENCH_FOODS = [
+    ("chicken breast", 165, 31, 0, 3.6), ("rice", 130, 2.7, 28, 0.3), ("olive oil", 884, 0, 0, 100),
+    ("broccoli", 34, 2.8, 7, 0.4), ("oats", 389, 16.9, 66, 6.9), ("egg", 155, 13, 1.1, 11),
+    ("milk", 42, 3.4, 5, 1), ("banana", 89, 1.1, 23, 0.3), ("salmon", 208, 20, 0, 13),
+    ("potato", 77, 2, 17, 0.1), ("greek yogurt", 59, 10, 3.6, 0.4), ("almonds", 579, 21, 22, 50),
+]
+
+
+def run_plan(args):
+    session, user_id, _ = login_bench_user(args.url)
+    for name, calories, protein, carbs, fats in BENCH_FOODS:
+        session.post(f"{args.url}/foods/{user_id}", json={
+            "name": name, "calories": calories, "protein": protein, "carbs": carbs, "fats": fats
+        }, timeout=60)
+    targets = {"protein": 160, "carbs": 260, "fats": 80, "num_meals": args.meals}
+
+    llm, local, hybrid = [], [], []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        session.post(f"{args.url}/generate_meal/", json={
+            "prompt": f"Generate {args.meals} meals for one day.", "use_food_list": True, "regenerate": True
+        }, timeout=120)
+        llm.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        session.post(f"{args.url}/generate_meal/local", json=targets, timeout=120)
+        local.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        session.post(f"{args.url}/generate_meal/local", json={**targets, "with_instructions": True}, timeout=120)
+        hybrid.append(time.perf_counter() - start)
+    print_latencies("/generate_meal/ one completion", llm)
+    print_latencies("/generate_meal/local solve only", local)
+    print_latencies("/generate_meal/local + parallel instructions", hybrid)
+
+
+### Coalescing: fan-in of identical macro lookups for foods nobody has looked up yet
+def run_coalesce(args):
+    session, _, _ = login_bench_user(args.url)
+    suffix = random.randint(10**6, 10**7)
+    names = [f"{BENCH_FOODS[i % len(BENCH_FOODS)][0]} {suffix}-{i}" for i in range(args.foods)]
+
+    def lookup(name):
+        start = time.perf_counter()
+        resp = session.get(f"{args.url}/get_food_macros/{name}", timeout=120)
+        return time.perf_counter() - start, resp.ok and "error" not in resp.json()
+
+    with ThreadPoolExecutor(max_workers=args.foods * args.fan_in) as pool:
+        results = list(pool.map(lookup, [name for name in names for _ in range(args.fan_in)]))
+    print_latencies(f"{args.foods} new foods x {args.fan_in} concurrent lookups", [t for t, _ in results])
+    print(f"successful: {sum(ok for _, ok in results)}/{len(results)}")
+    if args.admin_token:
+        stats = session.get(
+            f"{args.url}/admin/food_macro_cache/stats", headers={"X-Admin-Token": args.admin_token}, timeout=30
+        ).json()
+        print(f"LLM calls: {stats['lookups']['calls']}, coalesced: {stats['lookups']['coalesced']}")
+
+
+### Batch lookups: one completion for a recipe's worth of new foods
+def run_batch(args):
+    session, _, _ = login_bench_user(args.url)
+    singles, batches = [], []
+    for run in range(args.runs):
+        suffix = random.randint(10**6, 10**7)
+        names = [f"{BENCH_FOODS[i % len(BENCH_FOODS)][0]} {suffix}-{i}" for i in range(args.foods)]
+        start = time.perf_counter()
+        for name in names:
+            session.get(f"{args.url}/get_food_macros/{name}", timeout=120)
+        singles.append(time.perf_counter() - start)
+
+        names = [f"{name} batch" for name in names]
+        start = time.perf_counter()
+        resp = session.post(f"{args.url}/get_food_macros/batch", json={"food_names": names}, timeout=120)
+        batches.append(time.perf_counter() - start)
+        failed = [name for name, macros in resp.json()["results"].items() if "error" in macros]
+        if failed:
+            print(f"batch run {run}: {len(failed)} lookups failed")
+    print_latencies(f"{args.foods} x GET /get_food_macros", singles)
+    print_latencies(f"POST /get_food_macros/batch of {args.foods}", batches)
+
+
+### Typeahead: reference table search per keystroke
+def run_search(args):
+    from food_reference import FoodReference
+
+    start = time.perf_counter()
+    reference = FoodReference.load(str.lower)
+    print(f"loaded {len(reference.names)} reference foods in {(time.perf_counter() - start) * 1000:.1f}ms")
+    # Every prefix of every name, as typed one keystroke at a time
+    queries = [name[:end] for name in reference.names for end in range(1, len(name) + 1)]
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        reference.search(query)
+        samples.append(time.perf_counter() - start)
+    print_latencies("in-process search", samples)
+
+    if args.url:
+        session, _, _ = login_bench_user(args.url)
+        samples = []
+        for query in random.Random(0).sample(queries, min(args.requests, len(queries))):
+            start = time.perf_counter()
+            session.get(f"{args.url}/foods/search", params={"q": query}, timeout=30).raise_for_status()
+            samples.append(time.perf_counter() - start)
+        print_latencies("GET /foods/search", samples)
+
+
+### CRUD throughput: small reads on one worker's event loop, in process (no HTTP server or client)
+CRUD_READS = [
+    "/foods/{user_id}",
+    "/meals/names/{user_id}",
+    "/meals/{user_id}/Bench Meal",
+    "/target_macros/{user_id}",
+    "/user_daily_macros/{user_id}/trend?period=week&end=2025-03-31",
+    "/food_log/{user_id}/totals?period=week",
+]
+
+
+def run_crud(args):
+    import asyncio
+    import httpx
+
+    workdir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'crud.db')}")
+    os.environ.setdefault("LLM_PROVIDER", "fake")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    import food_macros_api as api
+
+    api.migrate_schema(api.engine)
+
+    async def bench():
+        # ASGITransport skips lifespan events; without shutdown the pools keep the process alive
+        transport = httpx.ASGITransport(app=api.app)
+        async with api.app.router.lifespan_context(api.app), \
+                httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            username = f"bench-{random.randint(10**6, 10**7)}"
+            await client.post("/register/", json={"username": username, "password": BENCH_PASSWORD})
+            tokens = (await client.post("/login/", json={"username": username, "password": BENCH_PASSWORD})).json()
+            user_id = tokens["id"]
+            client.headers["Authorization"] = f"Bearer {tokens['access_token']}"
+            foods = "\n".join(
+                json.dumps({"name": f"food {i}", "calories": 100 + i, "protein": 10, "carbs": 10, "fats": 5})
+                for i in range(args.foods)
+            )
+            await client.post(f"/foods/{user_id}/import", params={"format": "jsonl"}, content=foods)
+            await client.post(f"/save_meal/{user_id}", json=[
+                {"meal_name": "Bench Meal", "food_name": f"food {i}", "grams": 100} for i in range(5)
+            ])
+            await client.post(f"/target_macros/{user_id}", json={
+                "weight": 80, "height": 180, "body_fat": 15, "activity_level": "Moderate", "goal": "Maintain",
+                "tdee": 2600, "target_calories": 2600, "protein": 160, "carbs": 300, "fats": 80,
+            })
+            for day in range(1, 32):
+                await client.post(f"/user_daily_macros/{user_id}", json={
+                    "date": f"2025-03-{day:02d}", "protein": 150, "carbs": 250, "fats": 70, "calories": 2230
+                })
+                await client.post(f"/food_log/{user_id}", json=[
+                    {"food_name": "food 1", "grams": 80, "date": f"2025-03-{day:02d}"}
+                ])
+
+            paths = [path.format(user_id=user_id) for path in CRUD_READS]
+            samples, statuses = [], []
+
+            async def worker(number):
+                for i in range(number, args.requests, args.concurrency):
+                    start = time.perf_counter()
+                    resp = await client.get(paths[i % len(paths)])
+                    samples.append(time.perf_counter() - start)
+                    statuses.append(resp.status_code)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(number) for number in range(args.concurrency)))
+            elapsed = time.perf_counter() - start
+        print_latencies(f"CRUD reads ({len(samples) / elapsed:.0f}/s)", samples)
+        print(f"  status counts: { {s: statuses.count(s) for s in set(statuses)} }")
+
+    asyncio.run(bench())
+
+
+### Prompt size: food list formatting for use_food_list requests
+def approx_tokens(text):
+    # Words, numbers and punctuation marks each count as a token, close to BPE for tabular text
+    return len(re.findall(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]", text))
+
+
+def run_prompt(args):
+    import food_macros_api as api
+
+    rng = random.Random(0)
+    foods = []
+    for i in range(args.foods):
+        protein, carbs, fats = rng.uniform(0, 30), rng.uniform(0, 70), rng.uniform(0, 30)
+        foods.append({
+            "name": f"{rng.choice(BENCH_FOODS)[0]} variety {i}",
+            "calories": 4 * protein + 4 * carbs + 9 * fats, "protein": protein, "carbs": carbs, "fats": fats,
+        })
+
+    # Previously each row was formatted in full, once by the API and once more by meal_planning.py
+    legacy_list = "\n".join(
+        f"{f['name']}: {f['calories']} kcal, {f['protein']}g protein, {f['carbs']}g carbs, {f['fats']}g fats"
+        for f in foods
+    )
+    legacy = f"Use ONLY these foods:\n{legacy_list}\n" + f"Use only these ingredients:\n{legacy_list}\n"
+    compact = api.compact_food_table(foods)
+    targets = {"protein": 160, "carbs": 260, "fats": 80}
+    top_k = api.compact_food_table(api.select_prompt_foods(foods, targets, args.top_k))
+    for label, text in [("previous", legacy), ("compact", compact), (f"compact top-{args.top_k}", top_k)]:
+        print(f"{label:16s}: {len(text):7d} chars, ~{approx_tokens(text):6d} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fake = commands.add_parser("fake-openai", help="Serve canned OpenAI chat completions with fixed latency")
+    fake.add_argument("--port", type=int, default=9000)
+    fake.add_argument("--latency", type=float, default=3.0, help="Seconds per completion")
+    fake.add_argument("--per-kchar", type=float, default=0.0, help="Extra seconds per 1000 characters of completion")
+    fake.set_defaults(func=run_fake_openai)
+
+    load = commands.add_parser("load", help="Measure /foods latency under concurrent /generate_meal/ traffic")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--llm-concurrency", type=int, default=60)
+    load.add_argument("--samples", type=int, default=50, help="Idle /foods samples before the load starts")
+    load.add_argument("--warmup", type=float, default=2.0)
+    load.add_argument("--duration", type=float, default=15.0)
+    load.set_defaults(func=run_load)
+
+    stream = commands.add_parser("stream", help="Compare time-to-first-meal of streaming vs. blocking generation")
+    stream.add_argument("--url", default="http://127.0.0.1:8000")
+    stream.add_argument("--runs", type=int, default=5)
+    stream.set_defaults(func=run_stream)
+
+    indexes = commands.add_parser("indexes", help="Per-user query latency before/after the index migration")
+    indexes.add_argument("--rows", type=int, default=1_000_000, help="Rows seeded into each of foods, meals, daily_macros")
+    indexes.add_argument("--users", type=int, default=10_000)
+    indexes.add_argument("--repeats", type=int, default=50)
+    indexes.set_defaults(func=run_indexes)
+
+    bulk = commands.add_parser("import", help="Time a bulk CSV food import")
+    bulk.add_argument("--url", default="http://127.0.0.1:8000")
+    bulk.add_argument("--rows", type=int, default=10_000)
+    bulk.set_defaults(func=run_import)
+
+    login = commands.add_parser("login", help="Login throughput and /foods latency during a login storm")
+    login.add_argument("--url", default="http://127.0.0.1:8000")
+    login.add_argument("--concurrency", type=int, default=32)
+    login.add_argument("--samples", type=int, default=50, help="Idle /foods samples before the storm starts")
+    login.add_argument("--warmup", type=float, default=2.0)
+    login.add_argument("--duration", type=float, default=15.0)
+    login.set_defaults(func=run_login)
+
+    writes = commands.add_parser("writes", help="Concurrent write/read throughput and lock errors on SQLite")
+    writes.add_argument("--url", default="http://127.0.0.1:8000")
+    writes.add_argument("--writers", type=int, default=16)
+    writes.add_argument("--readers", type=int, default=16)
+    writes.add_argument("--users", type=int, default=4)
+    writes.add_argument("--duration", type=float, default=15.0)
+    writes.add_argument("--importers", type=int, default=1, help="Threads streaming CSV imports during the writes")
+    writes.add_argument("--import-rows", type=int, default=2000)
+    writes.add_argument("--upload-seconds", type=float, default=3.0, help="How long each import body takes to send")
+    writes.add_argument("--admin-token", help="ADMIN_TOKEN of the API, to report write queue group sizes")
+    writes.set_defaults(func=run_writes)
+
+    workers = commands.add_parser("workers", help="Write/read throughput of several API workers on SQLite vs. PostgreSQL")
+    workers.add_argument("--backends", nargs="+", choices=["sqlite", "postgres"], default=["sqlite", "postgres"])
+    workers.add_argument("--workers", nargs="+", type=int, default=[1, 4], help="uvicorn worker counts to compare")
+    workers.add_argument("--port", type=int, default=8100, help="First port; each run uses the next one")
+    workers.add_argument("--writers", type=int, default=16)
+    workers.add_argument("--readers", type=int, default=16)
+    workers.add_argument("--users", type=int, default=4)
+    workers.add_argument("--duration", type=float, default=15.0)
+    workers.set_defaults(func=run_workers)
+
+    plan = commands.add_parser("plan", help="Compare one-shot LLM plans with local solve + per-meal instructions")
+    plan.add_argument("--url", default="http://127.0.0.1:8000")
+    plan.add_argument("--meals", type=int, default=4)
+    plan.add_argument("--runs", type=int, default=5)
+    plan.set_defaults(func=run_plan)
+
+    coalesce = commands.add_parser("coalesce", help="Concurrent identical /get_food_macros lookups of new foods")
+    coalesce.add_argument("--url", default="http://127.0.0.1:8000")
+    coalesce.add_argument("--foods", type=int, default=5)
+    coalesce.add_argument("--fan-in", type=int, default=20, help="Concurrent lookups per food")
+    coalesce.add_argument("--admin-token", help="ADMIN_TOKEN of the API, to report its LLM call count")
+    coalesce.set_defaults(func=run_coalesce)
+
+    batch = commands.add_parser("batch", help="Look up new foods one by one vs. in one batch request")
+    batch.add_argument("--url", default="http://127.0.0.1:8000")
+    batch.add_argument("--foods", type=int, default=10)
+    batch.add_argument("--runs", type=int, default=3)
+    batch.set_defaults(func=run_batch)
+
+    search = commands.add_parser("search", help="Reference table typeahead latency per keystroke")
+    search.add_argument("--url", help="Also time GET /foods/search against a running API")
+    search.add_argument("--requests", type=int, default=500)
+    search.set_defaults(func=run_search)
+
+    crud = commands.add_parser("crud", help="Small CRUD read throughput of one worker, in process")
+    crud.add_argument("--requests", type=int, default=5000)
+    crud.add_argument("--concurrency", type=int, default=64)
+    crud.add_argument("--foods", type=int, default=50, help="Foods seeded for the bench user")
+    crud.set_defaults(func=run_crud)
+
+    prompt = commands.add_parser("prompt", help="Food list prompt size before and after compaction")
+    prompt.add_argument("--foods", type=int, default=500)
+    prompt.add_argument("--top-k", type=int, default=60)
+    prompt.set_defaults(func=run_prompt)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
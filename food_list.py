@@ -1,6 +1,8 @@
 import streamlit as st
+import json
 import requests
 import pandas as pd
+import api_client
 from config import BASE_API_URL
 
 # CSS for bordered sections
@@ -34,7 +36,7 @@ def show():
     # Fetch current foods
     def get_food_list():
         try:
-            response = requests.get(foods_api_url)
+            response = api_client.cached_get(foods_api_url, user_id, params={"fields": "name,calories,protein,carbs,fats"})
             if response.status_code == 200:
                 return response.json()
             else:
@@ -76,7 +78,8 @@ def show():
         if st.button("Delete Food"):
             if food_to_delete:
                 try:
-                    response = requests.delete(f"{BASE_API_URL}/foods/{user_id}/{food_to_delete}")
+                    response = api_client.delete(f"{BASE_API_URL}/foods/{user_id}/{food_to_delete}")
+                    api_client.invalidate(user_id)
                     if response.status_code == 200:
                         st.success(f"✅ {food_to_delete} deleted successfully!")
                         st.rerun()
@@ -94,10 +97,30 @@ def show():
         st.subheader("Search Food Macros")
         search_food_name = st.text_input("Enter a food name to search:")
 
-        if st.button("Search Macros"):
+        # Common foods come from the API's bundled reference table, without the AI
+        if search_food_name:
+            try:
+                response = api_client.get(f"{BASE_API_URL}/foods/search", params={"q": search_food_name})
+                matches = response.json() if response.status_code == 200 else []
+            except requests.exceptions.RequestException:
+                matches = []
+            if matches:
+                labels = [
+                    f"{m['name']} ({m['calories']:g} kcal, {m['protein']:g}g protein, "
+                    f"{m['carbs']:g}g carbs, {m['fats']:g}g fats)"
+                    for m in matches
+                ]
+                choice = st.selectbox("Matching foods (per 100g)", range(len(matches)), format_func=labels.__getitem__)
+                if st.button("Use This Food"):
+                    st.session_state["food_macros"] = matches[choice]
+                    st.success(f"✅ Macros for {matches[choice]['name']} loaded.")
+            else:
+                st.caption("No match in the food reference. Ask the AI below.")
+
+        if st.button("Search Macros with AI"):
             if search_food_name:
                 try:
-                    response = requests.get(f"{macros_api_url}{search_food_name}")
+                    response = api_client.get(f"{macros_api_url}{search_food_name}", timeout=api_client.LLM_TIMEOUT)
                     if response.status_code == 200:
                         st.session_state["food_macros"] = response.json()
                         st.success(f"✅ Macros for {search_food_name} loaded.")
@@ -109,13 +132,59 @@ def show():
                 st.warning("⚠️ Please enter a food name.")
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # Look up several foods at once and add them together
+    with st.container():
+        st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
+        st.subheader("Look Up Several Foods")
+        batch_names = st.text_area("Enter one food name per line:")
+
+        if st.button("Look Up All"):
+            names = [name.strip() for name in batch_names.splitlines() if name.strip()]
+            if names:
+                try:
+                    response = api_client.post(
+                        f"{macros_api_url}batch", json={"food_names": names}, timeout=api_client.LLM_TIMEOUT
+                    )
+                    if response.status_code == 200:
+                        results = response.json()["results"]
+                        failed = [name for name, macros in results.items() if "error" in macros]
+                        st.session_state["batch_macros"] = [
+                            {"name": name, **macros} for name, macros in results.items() if "error" not in macros
+                        ]
+                        if failed:
+                            st.warning(f"⚠️ Could not look up: {', '.join(failed)}")
+                    else:
+                        st.error(f"❌ Error fetching macros: {response.text}")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"❌ API request failed: {str(e)}")
+            else:
+                st.warning("⚠️ Please enter at least one food name.")
+
+        batch_macros = st.session_state.get("batch_macros")
+        if batch_macros:
+            edited = st.data_editor(pd.DataFrame(batch_macros), use_container_width=True, key="batch_macros_editor")
+            if st.button("Add All to Food List"):
+                lines = "\n".join(json.dumps(row) for row in edited.to_dict(orient="records"))
+                try:
+                    resp = api_client.post(f"{foods_api_url}/import", params={"format": "jsonl"}, data=lines.encode())
+                    api_client.invalidate(user_id)
+                    if resp.status_code == 200:
+                        st.success(f"✅ Added {resp.json()['imported']} foods.")
+                        st.session_state["batch_macros"] = None
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Error adding foods: {resp.text}")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"❌ API request failed: {str(e)}")
+        st.markdown("</div>", unsafe_allow_html=True)
+
     # Add New Food
     with st.container():
         st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
         st.subheader("Add a New Food")
         food_macros = st.session_state.get("food_macros", {})
 
-        new_food_name = st.text_input("Food Name", value=search_food_name)
+        new_food_name = st.text_input("Food Name", value=food_macros.get("name", search_food_name))
         calories = st.number_input("Calories (kcal per 100g)", value=float(food_macros.get("calories", 0.0)), step=1.0)
         protein = st.number_input("Protein (g)", value=float(food_macros.get("protein", 0.0)), step=0.1)
         carbs = st.number_input("Carbs (g)", value=float(food_macros.get("carbs", 0.0)), step=0.1)
@@ -131,7 +200,8 @@ def show():
                     "fats": fats
                 }
                 try:
-                    resp = requests.post(foods_api_url, json=payload)
+                    resp = api_client.post(foods_api_url, json=payload)
+                    api_client.invalidate(user_id)
                     if resp.status_code == 200:
                         st.success(f"✅ {new_food_name} added successfully!")
                         st.session_state["food_macros"] = {}
@@ -144,3 +214,34 @@ def show():
             else:
                 st.warning("⚠️ Please enter a food name.")
         st.markdown("</div>", unsafe_allow_html=True)
+
+    # Bulk Import
+    with st.container():
+        st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
+        st.subheader("Import Foods from File")
+        st.caption("CSV with a header row (name, calories, protein, carbs, fats per 100g) or JSONL with the same fields.")
+        upload = st.file_uploader("Choose a file", type=["csv", "jsonl"])
+
+        if st.button("Import Foods"):
+            if upload:
+                file_format = "csv" if upload.name.lower().endswith(".csv") else "jsonl"
+                try:
+                    resp = api_client.post(
+                        f"{foods_api_url}/import",
+                        params={"format": file_format},
+                        data=upload.getvalue()
+                    )
+                    api_client.invalidate(user_id)
+                    if resp.status_code == 200:
+                        result = resp.json()
+                        st.success(f"✅ Imported {result['imported']} foods.")
+                        if result["errors"]:
+                            st.warning(f"⚠️ {result['failed']} rows could not be imported.")
+                            st.dataframe(pd.DataFrame(result["errors"]), use_container_width=True)
+                    else:
+                        st.error(f"❌ Error importing foods: {resp.text}")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"❌ API request failed: {str(e)}")
+            else:
+                st.warning("⚠️ Please choose a file to import.")
+        st.markdown("</div>", unsafe_allow_html=True)
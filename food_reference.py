@@ -0,0 +1,92 @@
+"""
+Bundled nutrient reference for common foods, with a typeahead search over it.
+
+food_reference.csv is the editable source: calories and macros per 100 g,
+rounded, after USDA FoodData Central (plain names are cooked/ready to eat).
+The API memory-maps food_reference.parquet, built from it with:
+> python food_reference.py
+
+Search is a trigram index over the words of each name. The last word of a
+query counts as a prefix, so "chicken br" finds "chicken breast", and a
+typo only costs the trigrams it touches ("chiken" still matches "chicken").
+"""
+import os
+import re
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+MACROS = ["calories", "protein", "carbs", "fats"]
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "food_reference.csv")
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "food_reference.parquet")
+# A name must contain more than this share of a query's trigrams to be returned
+MIN_SCORE = 0.5
+
+
+def words(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def trigrams(word, prefix=False):
+    """Trigrams of a word padded at the start and, unless it is a prefix still being typed, at the end."""
+    padded = f"  {word}" if prefix else f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FoodReference:
+    def __init__(self, table, normalize):
+        """`table` has a name column and MACROS; `normalize` maps a food name to its cache key."""
+        self.names = table.column("name").to_pylist()
+        self.macros = np.column_stack([table.column(m).to_numpy() for m in MACROS])
+        self._by_key = {normalize(name): i for i, name in enumerate(self.names)}
+        index = {}
+        for i, name in enumerate(self.names):
+            for gram in set().union(*(trigrams(w) for w in words(name))):
+                index.setdefault(gram, []).append(i)
+        self._index = {gram: np.array(ids, dtype=np.int32) for gram, ids in index.items()}
+        # Shorter names rank first among equal scores: "apple" before "apple juice"
+        self._name_lengths = np.array([len(name) for name in self.names])
+
+    @classmethod
+    def load(cls, normalize, path=DEFAULT_PATH):
+        return cls(pq.read_table(path, memory_map=True), normalize)
+
+    def row(self, i) -> dict:
+        return {"name": self.names[i], **dict(zip(MACROS, self.macros[i].tolist()))}
+
+    def lookup(self, key: str):
+        """Macros of the food whose normalized name is `key`, or None."""
+        i = self._by_key.get(key)
+        return None if i is None else dict(zip(MACROS, self.macros[i].tolist()))
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Up to `limit` foods best matching `query`, as rows with a match score in 0..1."""
+        query_words = words(query)
+        if not query_words:
+            return []
+        grams = set().union(
+            *(trigrams(w) for w in query_words[:-1]), trigrams(query_words[-1], prefix=True)
+        )
+        scores = np.zeros(len(self.names))
+        for gram in grams:
+            ids = self._index.get(gram)
+            if ids is not None:
+                scores[ids] += 1
+        scores /= len(grams)
+        candidates = np.flatnonzero(scores > MIN_SCORE)
+        ranked = candidates[np.lexsort((self._name_lengths[candidates], -scores[candidates]))][:limit]
+        return [{**self.row(i), "score": round(float(scores[i]), 3)} for i in ranked]
+
+
+def build(source=SOURCE_PATH, path=DEFAULT_PATH):
+    table = pa_csv.read_csv(
+        source, convert_options=pa_csv.ConvertOptions(column_types={m: pa.float64() for m in MACROS})
+    )
+    pq.write_table(table, path, compression="zstd")
+    return table.num_rows
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build()} foods to {DEFAULT_PATH}")
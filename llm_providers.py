@@ -0,0 +1,144 @@
+"""
+Chat completion backends for the API, all used through the OpenAI client interface
+(`client.chat.completions.create(...)`, with or without stream=True):
+
+- "openai": the OpenAI API (OPENAI_API_KEY, optional OPENAI_BASE_URL)
+- "ollama": a local Ollama server through its OpenAI-compatible /v1 endpoint
+- "fake":   canned JSON answers after a configurable delay, no network at all
+
+The fake picks its answer from the prompt the same way the benchmark's fake
+OpenAI server does, so the API, benchmarks and load tests run offline.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+import uuid
+from types import SimpleNamespace
+
+PROVIDERS = ["openai", "ollama", "fake"]
+DEFAULT_MODELS = {"openai": "gpt-4o-mini-2024-07-18", "ollama": "llama3.2", "fake": "fake"}
+
+CANNED_MEAL_PLAN = {
+    "meals": [
+        {
+            "meal": "Chicken Rice Bowl",
+            "recipe": {
+                "ingredients": [{"food": "chicken breast", "grams": 150}, {"food": "rice", "grams": 100}],
+                "instructions": "Cook the rice. Grill the chicken. Serve together.",
+            },
+            "calories": 600.0,
+            "protein": 50.0,
+            "carbs": 80.0,
+            "fats": 8.0,
+        }
+        for _ in range(4)
+    ]
+}
+CANNED_MACROS = {"calories": 165.0, "protein": 31.0, "carbs": 0.0, "fats": 3.6}
+CANNED_INSTRUCTIONS = {
+    "meal": "Chicken Rice Bowl",
+    "instructions": "Cook the rice. Season and grill the chicken. Slice it and serve over the rice.",
+}
+CANNED_RESPONSES = {"meal_plan": CANNED_MEAL_PLAN, "macros": CANNED_MACROS, "instructions": CANNED_INSTRUCTIONS}
+
+
+class LLMConfigurationError(RuntimeError):
+    pass
+
+
+def canned_completion(messages, responses=None):
+    """Return (content text, usage dict) answering `messages` with the matching canned JSON."""
+    responses = responses or CANNED_RESPONSES
+    prompt = " ".join(m.get("content", "") for m in messages)
+    if "each numbered food" in prompt:
+        # Batch macro lookup: the same macros for every "<id>. <name>" line
+        ids = [int(i) for i in re.findall(r"^\s*(\d+)\. ", prompt, re.MULTILINE)]
+        content = {"foods": [{"id": i, **responses["macros"]} for i in ids]}
+    elif "exactly the listed ingredients" in prompt:
+        content = responses["instructions"]
+    elif "meal" in prompt.lower():
+        content = responses["meal_plan"]
+    else:
+        content = responses["macros"]
+    text = json.dumps(content)
+    # Rough token counts, ~4 characters per token
+    usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+    return text, usage
+
+
+class FakeChatCompletions:
+    def __init__(self, latency, per_kchar, responses):
+        self.latency = latency
+        self.per_kchar = per_kchar
+        self.responses = responses
+
+    async def create(self, messages, model="fake", stream=False, stream_options=None, **kwargs):
+        text, usage = canned_completion(messages, self.responses)
+        delay = self.latency + self.per_kchar * len(text) / 1000
+        usage = SimpleNamespace(**usage)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        if stream:
+            include_usage = bool((stream_options or {}).get("include_usage"))
+            return self._stream(completion_id, model, text, delay, usage if include_usage else None)
+        await asyncio.sleep(delay)
+        return SimpleNamespace(
+            id=completion_id,
+            created=int(time.time()),
+            model=model,
+            choices=[SimpleNamespace(
+                index=0, finish_reason="stop", message=SimpleNamespace(role="assistant", content=text)
+            )],
+            usage=usage,
+        )
+
+    async def _stream(self, completion_id, model, text, delay, usage):
+        # Spread the delay evenly over ~20-character deltas, like the benchmark's fake server
+        deltas = [text[i:i + 20] for i in range(0, len(text), 20)]
+        for delta in deltas:
+            await asyncio.sleep(delay / len(deltas))
+            yield SimpleNamespace(
+                id=completion_id, model=model, usage=None,
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=delta), finish_reason=None)],
+            )
+        if usage is not None:
+            yield SimpleNamespace(id=completion_id, model=model, choices=[], usage=usage)
+
+
+class FakeLLMClient:
+    """In-process stand-in for openai.AsyncOpenAI answering with canned JSON."""
+
+    def __init__(self, latency=0.0, per_kchar=0.0, responses_file=None):
+        responses = dict(CANNED_RESPONSES)
+        if responses_file:
+            with open(responses_file) as f:
+                responses.update(json.load(f))
+        self.chat = SimpleNamespace(completions=FakeChatCompletions(latency, per_kchar, responses))
+
+
+def create_client(provider, timeout):
+    """
+    Build the async client for `provider`. Configuration comes from the
+    environment; see the module docstring and food_macros_api's LLM settings.
+    """
+    if provider == "fake":
+        return FakeLLMClient(
+            latency=float(os.getenv("LLM_FAKE_LATENCY_SECONDS", 0)),
+            per_kchar=float(os.getenv("LLM_FAKE_PER_KCHAR_SECONDS", 0)),
+            responses_file=os.getenv("LLM_FAKE_RESPONSES_FILE"),
+        )
+
+    import openai
+
+    if provider == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise LLMConfigurationError("Missing OpenAI API Key. Set OPENAI_API_KEY or choose another LLM_PROVIDER.")
+        return openai.AsyncOpenAI(api_key=api_key, timeout=timeout)
+    if provider == "ollama":
+        base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+        # Ollama ignores the key, but the client requires one
+        return openai.AsyncOpenAI(api_key="ollama", base_url=f"{base_url}/v1", timeout=timeout)
+    raise LLMConfigurationError(f"Unknown LLM_PROVIDER {provider!r}; expected one of {', '.join(PROVIDERS)}.")
@@ -1,5 +1,5 @@
 import streamlit as st
-import requests
+import api_client
 from config import BASE_API_URL
 
 #BASE_API_URL = "https://food-macro-tracker.onrender.com"
@@ -11,12 +11,14 @@ def show():
     password = st.text_input("Password", type="password")
 
     if st.button("Login"):
-        response = requests.post(f"{BASE_API_URL}/login/", json={"username": username, "password": password})
+        response = api_client.post(f"{BASE_API_URL}/login/", json={"username": username, "password": password})
         
         if response.status_code == 200:
             user_data = response.json()
             st.session_state['user_id'] = user_data['id']
             st.session_state['username'] = username
+            st.session_state['access_token'] = user_data['access_token']
+            st.session_state['refresh_token'] = user_data['refresh_token']
             st.rerun()
         else:
             st.error("Login failed. Please check your credentials.")
@@ -1,7 +1,9 @@
+import datetime
 import streamlit as st
 import requests
 import pandas as pd
 import plotly.express as px
+import api_client
 from config import BASE_API_URL
 
 # CSS for bordered sections
@@ -37,7 +39,7 @@ def show():
 
     # Fetch food list
     foods_url = f"{BASE_API_URL}/foods/{user_id}"
-    foods_response = requests.get(foods_url)
+    foods_response = api_client.cached_get(foods_url, user_id, params={"fields": "name,calories,protein,carbs,fats"})
     if foods_response.status_code != 200:
         st.error(f"❌ Could not fetch food list. Server responded with: {foods_response.text}")
         return
@@ -58,9 +60,10 @@ def show():
 
     # Fetch saved meals
     meal_names_url = f"{BASE_API_URL}/meals/names/{user_id}"
-    saved_meals_response = requests.get(meal_names_url)
+    saved_meals_response = api_client.cached_get(meal_names_url, user_id)
     saved_meal_names = saved_meals_response.json() if saved_meals_response.status_code == 200 else []
 
+    today = datetime.date.today().isoformat()
     total_macros = {"Calories": 0.0, "Protein": 0.0, "Carbs": 0.0, "Fats": 0.0}
 
     # Meal Tabs
@@ -107,7 +110,7 @@ def show():
             # Load meal logic BEFORE multiselect widgets
             if load_meal_clicked and load_meal_select != "None":
                 load_meal_url = f"{BASE_API_URL}/meals/{user_id}/{load_meal_select}"
-                meal_details_response = requests.get(load_meal_url)
+                meal_details_response = api_client.cached_get(load_meal_url, user_id)
     
                 if meal_details_response.status_code == 200:
                     loaded_meal = meal_details_response.json()
@@ -161,8 +164,39 @@ def show():
                 total_macros["Carbs"] += macros["carbs"]
                 total_macros["Fats"] += macros["fats"]
     
-            # Save Meal button at the bottom
-            if st.button("Save Meal", key=save_button_key):
+            # The same meal is logged once a day; changing it allows logging it again
+            logged_key = f"logged_meal_{meal_num}"
+            meal_signature = (today, tuple((item["food_name"], item["grams"]) for item in meal_data))
+            already_logged = bool(meal_data) and st.session_state.get(logged_key) == meal_signature
+    
+            # Save / Log buttons at the bottom
+            save_col, log_col = st.columns(2)
+            with log_col:
+                log_clicked = st.button("Log as Eaten Today", key=f"log_meal_btn_{meal_num}", disabled=already_logged)
+                if already_logged:
+                    st.caption("✅ Logged today. Change the meal to log it again.")
+                elif log_clicked:
+                    # Ingredients left at 0 g were not eaten
+                    log_entries = [
+                        {"food_name": item["food_name"], "grams": item["grams"], "date": today}
+                        for item in meal_data if item["grams"] > 0
+                    ]
+                    if not log_entries:
+                        st.warning("⚠️ Select at least one ingredient with grams to log.")
+                    else:
+                        log_url = f"{BASE_API_URL}/food_log/{user_id}"
+                        try:
+                            resp = api_client.post(log_url, json=log_entries)
+                            api_client.invalidate(user_id)
+                            if resp.status_code == 200:
+                                st.session_state[logged_key] = meal_signature
+                                st.success(f"✅ Logged {len(log_entries)} item(s) for today.")
+                            else:
+                                st.error(f"❌ Error logging meal: {resp.text}")
+                        except requests.exceptions.RequestException as e:
+                            st.error(f"❌ Request failed: {str(e)}")
+
+            if save_col.button("Save Meal", key=save_button_key):
                 final_meal_name = meal_name_input.strip()
                 if not final_meal_name:
                     st.warning("⚠️ Please provide a meal name.")
@@ -176,12 +210,13 @@ def show():
                             "carbs": item["carbs"],
                             "fats": item["fats"]
                         }
-                        for item in meal_data
+                        for item in meal_data if item["grams"] > 0
                     ]
     
                     save_meal_url = f"{BASE_API_URL}/save_meal/{user_id}"
                     try:
-                        resp = requests.post(save_meal_url, json=meal_create_list)
+                        resp = api_client.post(save_meal_url, json=meal_create_list)
+                        api_client.invalidate(user_id)
                         if resp.status_code == 200:
                             st.success(f"✅ Meal '{final_meal_name}' saved successfully!")
                             st.rerun()
@@ -193,14 +228,24 @@ def show():
             st.markdown("</div>", unsafe_allow_html=True)
 
 
-    # Daily Macro Summary
+    # Today's totals are aggregated by the API from the food log
+    totals_url = f"{BASE_API_URL}/food_log/{user_id}/totals"
+    today_response = api_client.cached_get(totals_url, user_id, params={"period": "day", "start": today, "end": today})
+    today_rows = today_response.json() if today_response.status_code == 200 else []
+    logged = today_rows[0] if today_rows else {}
+    logged_macros = {m.capitalize(): logged.get(m, 0.0) for m in ["calories", "protein", "carbs", "fats"]}
+
+    # Daily Macro Summary: the meals entered above next to what has been logged today
     with st.container():
         st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
         st.subheader("Daily Macro Summary")
-        st.write(f"🔥 **Calories:** {total_macros['Calories']:.1f} kcal")
-        st.write(f"💪 **Protein:**  {total_macros['Protein']:.1f} g")
-        st.write(f"🍞 **Carbs:**    {total_macros['Carbs']:.1f} g")
-        st.write(f"🥑 **Fats:**     {total_macros['Fats']:.1f} g")
+        for column, title, macros in zip(st.columns(2), ["Meals Above", "Logged Today"], [total_macros, logged_macros]):
+            with column:
+                st.markdown(f"**{title}**")
+                st.write(f"🔥 **Calories:** {macros['Calories']:.1f} kcal")
+                st.write(f"💪 **Protein:**  {macros['Protein']:.1f} g")
+                st.write(f"🍞 **Carbs:**    {macros['Carbs']:.1f} g")
+                st.write(f"🥑 **Fats:**     {macros['Fats']:.1f} g")
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Macro Breakdown Chart
@@ -212,3 +257,49 @@ def show():
         fig = px.bar(df, x="Macro", y="Amount_g", title="Daily Macronutrient Breakdown", labels={"Amount_g": "Grams"}, color="Macro")
         st.plotly_chart(fig, use_container_width=True)
         st.markdown("</div>", unsafe_allow_html=True)
+
+    # Today's food log, with a delete button per entry
+    with st.container():
+        st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
+        st.subheader("Today's Log")
+
+        log_url = f"{BASE_API_URL}/food_log/{user_id}"
+        log_response = api_client.cached_get(log_url, user_id, params={"start": today, "end": today, "fields": "id,food_name,grams,calories"})
+        log_rows = log_response.json() if log_response.status_code == 200 else []
+        if log_rows:
+            for entry in log_rows:
+                entry_col, delete_col = st.columns([4, 1])
+                entry_col.write(f"{entry['food_name']}: {entry['grams']:g} g, {entry['calories']:.1f} kcal")
+                if delete_col.button("Delete", key=f"delete_log_{entry['id']}"):
+                    try:
+                        resp = api_client.delete(f"{log_url}/{entry['id']}")
+                        api_client.invalidate(user_id)
+                        if resp.status_code == 200:
+                            # A meal whose entries were deleted can be logged again
+                            for key in [key for key in st.session_state if key.startswith("logged_meal_")]:
+                                del st.session_state[key]
+                            st.rerun()
+                        else:
+                            st.error(f"❌ Error deleting entry: {resp.text}")
+                    except requests.exceptions.RequestException as e:
+                        st.error(f"❌ Request failed: {str(e)}")
+        else:
+            st.info("Nothing logged today.")
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # History Chart
+    with st.container():
+        st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
+        st.subheader("History")
+
+        period = st.radio("Group by", ["day", "week", "month"], horizontal=True, key="history_period")
+        history_response = api_client.cached_get(totals_url, user_id, params={"period": period})
+        history = history_response.json() if history_response.status_code == 200 else []
+        if history:
+            history_df = pd.DataFrame(history)
+            fig = px.line(history_df, x="period", y="calories", markers=True, title=f"Calories per {period}",
+                          labels={"period": period.capitalize(), "calories": "kcal"})
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Nothing logged yet.")
+        st.markdown("</div>", unsafe_allow_html=True)
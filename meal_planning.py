@@ -2,6 +2,7 @@ import streamlit as st
 import requests
 import json
 import pandas as pd
+import api_client
 from config import BASE_API_URL
 
 # CSS for bordered sections
@@ -69,10 +70,23 @@ def show():
         st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
         st.subheader("Choose Meal Plan Type")
         meal_plan_type = st.radio(
-            "How should the AI generate your meal plan?",
-            ["Let AI suggest foods", "Use my food list"],
+            "How should your meal plan be generated?",
+            ["Let AI suggest foods", "Use my food list", "Optimize my food list (fast, exact macros)"],
             index=0
         )
+        use_optimizer = meal_plan_type.startswith("Optimize")
+        if not use_optimizer:
+            regenerate = st.checkbox(
+                "Generate a fresh plan", value=False,
+                help="Similar requests are answered from previously generated plans unless this is checked."
+            )
+        if use_optimizer:
+            with_instructions = st.checkbox("Let AI write cooking instructions", value=True)
+            col1, col2 = st.columns(2)
+            with col1:
+                ingredient_range = st.slider("Ingredients per meal", 1, 12, (3, 8))
+            with col2:
+                gram_range = st.slider("Grams per ingredient", 5, 1000, (10, 400), step=5)
         st.markdown("</div>", unsafe_allow_html=True)
 
     # Number of Meals Selection
@@ -88,26 +102,24 @@ def show():
         st.subheader("Generate Meal Plan")
 
         if st.button("Generate Meal Plan"):
+            if use_optimizer:
+                show_optimized_plan({
+                    "protein": target_protein,
+                    "carbs": target_carbs,
+                    "fats": target_fats,
+                    "calories": target_calories,
+                    "num_meals": num_meals,
+                    "min_ingredients": ingredient_range[0],
+                    "max_ingredients": ingredient_range[1],
+                    "min_grams": gram_range[0],
+                    "max_grams": gram_range[1],
+                    "with_instructions": with_instructions,
+                })
+                return
+
             with st.spinner("Generating your personalized meal plan..."):
-                # If user wants to use their own foods, fetch them
+                # With use_food_list the API adds the user's foods to the prompt itself
                 use_food_list_flag = meal_plan_type == "Use my food list"
-                food_prompt = ""
-
-                if use_food_list_flag:
-                    foods_url = f"{BASE_API_URL}/foods/{user_id}"
-                    foods_response = requests.get(foods_url)
-                    if foods_response.status_code == 200:
-                        foods = foods_response.json()
-                        food_list = "\n".join([
-                            f"{f['name']}: {f['calories']} kcal, {f['protein']}g protein, {f['carbs']}g carbs, {f['fats']}g fats"
-                            for f in foods
-                        ])
-                        food_prompt = f"Use only these ingredients:\n{food_list}\n"
-                    else:
-                        st.error(f"❌ Unable to fetch your food list. {foods_response.text}")
-                        return
-                else:
-                    food_prompt = "You can freely suggest nutritious ingredients suitable for balanced meals."
 
                 # Build the prompt for the meal plan
                 prompt = f"""
@@ -139,67 +151,77 @@ def show():
                         }}
                     ]
                 }}
-                {food_prompt}
                 """.strip()
 
-                # Make request to /generate_meal
-                request_body = {"prompt": prompt, "use_food_list": use_food_list_flag}
-                response = requests.post(f"{BASE_API_URL}/generate_meal/", json=request_body)
-                
-                if response.status_code == 200:
-                    response_json = response.json()
-                    meal_plan_raw = response_json.get("meal_plan", "")
-                    
-                    # If the response is already a dict, assume it's valid JSON
-                    if isinstance(meal_plan_raw, dict):
-                        meal_plan = meal_plan_raw  # No need to process further
-                    
-                    # If it's a string, clean and parse it
-                    elif isinstance(meal_plan_raw, str):
-                        try:
-                            # Remove potential triple backticks or extra text
-                            meal_plan_cleaned = meal_plan_raw.strip("`").strip()
-                            
-                            # Extract only the JSON part if extra text is included
-                            json_start = meal_plan_cleaned.find("{")
-                            json_end = meal_plan_cleaned.rfind("}")
-                            if json_start != -1 and json_end != -1:
-                                meal_plan_cleaned = meal_plan_cleaned[json_start : json_end + 1]
-                            
-                            # Parse JSON
-                            meal_plan = json.loads(meal_plan_cleaned)
-                    
-                        except json.JSONDecodeError as e:
-                            st.error(f"❌ JSON Parse Error: {str(e)}")
-                            st.text(meal_plan_raw)  # Show raw response to debug
-                            return  # Stop execution if parsing fails
-                    
-                    else:
-                        st.error("⚠️ Unexpected API response format. Meal plan is neither JSON nor a valid string.")
-                        st.json(response_json)  # Debugging output
-                        return
-                
-                    if meal_plan and isinstance(meal_plan, dict) and "meals" in meal_plan:
+                # Stream from /generate_meal/stream so each meal renders as soon as it is ready
+                request_body = {
+                    "prompt": prompt,
+                    "use_food_list": use_food_list_flag,
+                    "targets": {"protein": target_protein, "carbs": target_carbs, "fats": target_fats},
+                    "num_meals": num_meals,
+                    "regenerate": regenerate,
+                }
+                try:
+                    with api_client.post(
+                        f"{BASE_API_URL}/generate_meal/stream", json=request_body, stream=True,
+                        timeout=api_client.LLM_TIMEOUT
+                    ) as response:
+                        if response.status_code != 200:
+                            st.error(f"❌ Failed to generate meal plan. Status code: {response.status_code}")
+                            st.text(response.text)
+                            return
+
                         st.subheader("AI-Generated Meal Plan")
-                
-                        for meal_item in meal_plan["meals"]:
-                            st.markdown(f"#### 🍽️ {meal_item['meal']}")
-                            ingr_df = pd.DataFrame(meal_item['recipe']['ingredients'])
-                            st.table(ingr_df)
-                            st.write(
-                                f"Calories: {meal_item['calories']} | "
-                                f"Protein: {meal_item['protein']} | "
-                                f"Carbs: {meal_item['carbs']} | "
-                                f"Fats: {meal_item['fats']}"
-                            )
-                            st.write("**Instructions:**", meal_item['recipe']['instructions'])
-                
-                    else:
-                        st.warning("⚠️ Unexpected response structure from backend.")
-                        st.json(meal_plan)
-                
-                else:
-                    st.error(f"❌ Failed to generate meal plan. Status code: {response.status_code}")
-                    st.text(response.text)
-                
-                
+                        meals_shown = 0
+                        for line in response.iter_lines():
+                            if not line:
+                                continue
+                            event = json.loads(line)
+                            if event["type"] == "meal":
+                                render_meal(event["meal"])
+                                meals_shown += 1
+                            elif event["type"] == "error":
+                                st.error(f"❌ Failed to generate meal plan: {event['detail']}")
+                                return
+                            elif event["type"] == "done" and meals_shown == 0:
+                                st.warning("⚠️ Unexpected response structure from backend.")
+                                st.json(event["meal_plan"])
+                            elif event["type"] == "done" and event.get("cached"):
+                                st.info("⚡ Served from a previously generated plan for similar targets. "
+                                        "Check \"Generate a fresh plan\" for a new one.")
+                except requests.exceptions.RequestException as e:
+                    st.error(f"❌ API request failed: {str(e)}")
+
+
+def show_optimized_plan(request_body):
+    """Solve the plan locally on the API (no LLM unless instructions are requested) and render it."""
+    timeout = api_client.LLM_TIMEOUT if request_body["with_instructions"] else api_client.DEFAULT_TIMEOUT
+    with st.spinner("Optimizing your meal plan..."):
+        try:
+            response = api_client.post(f"{BASE_API_URL}/generate_meal/local", json=request_body, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            st.error(f"❌ API request failed: {str(e)}")
+            return
+    if response.status_code != 200:
+        st.error(f"❌ Failed to generate meal plan: {response.text}")
+        return
+
+    st.subheader("Optimized Meal Plan")
+    for meal_item in response.json()["meal_plan"]["meals"]:
+        render_meal(meal_item)
+        if not meal_item["within_tolerance"]:
+            st.warning("⚠️ Your food list can't hit this meal's targets closely; consider adding more foods.")
+
+
+def render_meal(meal_item):
+    st.markdown(f"#### 🍽️ {meal_item.get('meal', 'Meal')}")
+    recipe = meal_item.get("recipe", {})
+    ingr_df = pd.DataFrame(recipe.get("ingredients", []))
+    st.table(ingr_df)
+    st.write(
+        f"Calories: {meal_item.get('calories')} | "
+        f"Protein: {meal_item.get('protein')} | "
+        f"Carbs: {meal_item.get('carbs')} | "
+        f"Fats: {meal_item.get('fats')}"
+    )
+    st.write("**Instructions:**", recipe.get("instructions", ""))
@@ -0,0 +1,150 @@
+"""
+Deterministic meal-plan solver: picks foods and gram amounts from a food list
+so each meal hits an equal share of the daily macro targets.
+
+Each meal is a small mixed-integer program solved with HiGHS (scipy.optimize.milp):
+continuous grams per food, a binary "used" flag per food, and slack variables
+for the deviation from each macro target. The objective minimizes the relative
+deviation, plus a small penalty for reusing foods already placed in earlier
+meals so the plan has some variety. Large food lists are narrowed to a few
+candidates per meal first, which keeps each solve at a few dozen milliseconds.
+"""
+import numpy as np
+from scipy import sparse
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+MACROS = ["calories", "protein", "carbs", "fats"]
+# Grams are rounded to this step after solving
+GRAM_STEP = 5
+# Objective cost of using a food once more than before, relative to a 100% deviation on one macro
+REUSE_PENALTY = 0.05
+# Tiny cost per ingredient so that, all else equal, simpler meals win
+INGREDIENT_PENALTY = 0.001
+# HiGHS stops once the plan is provably within this relative gap of the optimum;
+# good plans are found quickly, proving exact optimality is what takes time
+MIP_REL_GAP = 0.5
+# Foods considered per meal: the most protein-, carb- and fat-dense ones, a third each
+CANDIDATES_PER_MEAL = 15
+
+
+def solve_meal(foods, targets, min_ingredients, max_ingredients, min_grams, max_grams, uses=None):
+    """
+    Choose between min_ingredients and max_ingredients foods and their grams
+    (min_grams..max_grams each) for one meal. `foods` are dicts with a name and
+    per-100 g MACROS, `targets` maps each macro to the meal's target. Returns
+    a list of (food index, grams).
+    """
+    n = len(foods)
+    min_ingredients = min(min_ingredients, n)
+    per_gram = np.array([[food[m] / 100 for food in foods] for m in MACROS])
+    target = np.array([targets[m] for m in MACROS], dtype=float)
+    uses = np.zeros(n) if uses is None else np.asarray(uses, dtype=float)
+
+    # Variables: grams x (n), used flags y (n), over-target slack (4), under-target slack (4)
+    scale = 1 / np.maximum(target, 1.0)
+    cost = np.concatenate([np.zeros(n), INGREDIENT_PENALTY + REUSE_PENALTY * uses, scale, scale])
+    integrality = np.concatenate([np.zeros(n), np.ones(n), np.zeros(2 * len(MACROS))])
+    bounds = Bounds(
+        np.zeros(2 * n + 2 * len(MACROS)),
+        np.concatenate([np.full(n, float(max_grams)), np.ones(n), np.full(2 * len(MACROS), np.inf)]),
+    )
+
+    eye_n, eye_m = sparse.identity(n), sparse.identity(len(MACROS))
+    constraints = [
+        # per_gram @ x - over + under == target
+        LinearConstraint(sparse.hstack([per_gram, sparse.csr_matrix((len(MACROS), n)), -eye_m, eye_m]), target, target),
+        # y == 1 forces min_grams <= x <= max_grams, y == 0 forces x == 0
+        LinearConstraint(
+            sparse.hstack([eye_n, -max_grams * eye_n, sparse.csr_matrix((n, 2 * len(MACROS)))]), -np.inf, 0
+        ),
+        LinearConstraint(
+            sparse.hstack([eye_n, -min_grams * eye_n, sparse.csr_matrix((n, 2 * len(MACROS)))]), 0, np.inf
+        ),
+        LinearConstraint(
+            np.concatenate([np.zeros(n), np.ones(n), np.zeros(2 * len(MACROS))]), min_ingredients, max_ingredients
+        ),
+    ]
+    result = milp(
+        cost, constraints=constraints, integrality=integrality, bounds=bounds,
+        options={"mip_rel_gap": MIP_REL_GAP},
+    )
+    if result.x is None:
+        raise ValueError(f"No feasible meal: {result.message}")
+
+    grams = result.x[:n]
+    chosen = [i for i in range(n) if result.x[n + i] > 0.5]
+    return [(i, float(min(max_grams, max(min_grams, GRAM_STEP * round(grams[i] / GRAM_STEP))))) for i in chosen]
+
+
+def pick_candidates(foods, uses, count=CANDIDATES_PER_MEAL, weights=None):
+    """
+    Indices of up to `count` foods: for each of protein, carbs and fats, the
+    foods getting the largest share of their calories from it, preferring foods
+    not used yet. `weights` sets each macro's share of the picks (equal by
+    default). Ties break by position, so picks are deterministic.
+    """
+    if len(foods) <= count:
+        return list(range(len(foods)))
+    energy = {"protein": 4, "carbs": 4, "fats": 9}
+    if not weights or not any(weights.get(m, 0) > 0 for m in energy):
+        weights = dict.fromkeys(energy, 1.0)
+    total = sum(max(weights.get(m, 0), 0) for m in energy)
+    ranked = {
+        m: iter(sorted(
+            range(len(foods)),
+            key=lambda i: (uses[i], -energy[m] * foods[i][m] / max(foods[i]["calories"], 1.0), i),
+        ))
+        for m in energy
+    }
+    picked, taken = set(), dict.fromkeys(energy, 0)
+    while len(picked) < count:
+        # The macro furthest below its share of the picks so far goes next
+        macro = max(energy, key=lambda m: max(weights.get(m, 0), 0) / total * count - taken[m])
+        picked.add(next(i for i in ranked[macro] if i not in picked))
+        taken[macro] += 1
+    return sorted(picked)
+
+
+def solve_meal_plan(
+    foods, targets, num_meals, min_ingredients=3, max_ingredients=8, min_grams=10, max_grams=400, tolerance=0.1
+):
+    """
+    Plan num_meals meals that together hit the daily `targets` (calories,
+    protein, carbs, fats). Returns a dict in the same shape as the LLM meal
+    plans, with each meal's macros computed from the chosen grams and a
+    `within_tolerance` flag per meal (every macro within +/- tolerance of its target).
+    """
+    if not foods:
+        raise ValueError("No foods to plan with.")
+    if min_grams <= 0:
+        # A chosen food could be given 0 g and still count as an ingredient
+        raise ValueError("min_grams must be positive.")
+    if min_ingredients > max_ingredients or min_grams > max_grams:
+        raise ValueError("Minimums must not exceed maximums.")
+
+    meal_targets = {m: targets[m] / num_meals for m in MACROS}
+    uses = np.zeros(len(foods))
+    meals = []
+    for number in range(1, num_meals + 1):
+        candidates = pick_candidates(foods, uses)
+        items = [
+            (candidates[i], grams) for i, grams in solve_meal(
+                [foods[i] for i in candidates], meal_targets,
+                min_ingredients, max_ingredients, min_grams, max_grams, uses[candidates],
+            )
+        ]
+        for i, _ in items:
+            uses[i] += 1
+        totals = {m: round(sum(foods[i][m] * grams / 100 for i, grams in items), 1) for m in MACROS}
+        meals.append({
+            "meal": f"Meal {number}",
+            "recipe": {
+                "ingredients": [{"food": foods[i]["name"], "grams": grams} for i, grams in items],
+                "instructions": "",
+            },
+            **totals,
+            "within_tolerance": all(
+                abs(totals[m] - meal_targets[m]) <= tolerance * meal_targets[m] for m in MACROS
+            ),
+        })
+    return {"meals": meals, "targets": {m: round(meal_targets[m], 1) for m in MACROS}}
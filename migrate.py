@@ -0,0 +1,12 @@
+"""
+Create or upgrade the database schema at DATABASE_URL (default: the local
+SQLite file). Run it once before starting the API, and again after pulling
+changes to the models:
+> python migrate.py
+> uvicorn food_macros_api:app --workers 4
+"""
+from food_macros_api import engine, migrate_schema
+
+if __name__ == "__main__":
+    migrate_schema(engine)
+    print(f"Migrated {engine.url.render_as_string(hide_password=True)}")
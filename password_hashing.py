@@ -0,0 +1,33 @@
+"""
+bcrypt hashing helpers run inside the API's password worker processes.
+
+Kept free of app imports so that spawned workers (Windows/macOS) only load passlib.
+"""
+from passlib.context import CryptContext
+
+_contexts = {}
+
+
+def _context(rounds: int) -> CryptContext:
+    # Pinning min/max to the configured cost marks hashes with any other cost as needing an update
+    if rounds not in _contexts:
+        _contexts[rounds] = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_rounds=rounds,
+            bcrypt__max_rounds=rounds,
+        )
+    return _contexts[rounds]
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_password(password: str, hashed_password: str, rounds: int):
+    """
+    Return (valid, new_hash). new_hash is a fresh hash at the configured cost
+    when the stored hash was made with a different one, otherwise None.
+    """
+    return _context(rounds).verify_and_update(password, hashed_password)
@@ -1,5 +1,5 @@
 import streamlit as st
-import requests  # also needed for API calls later
+import api_client
 from config import BASE_API_URL
 #BASE_API_URL = "https://food-macro-tracker.onrender.com"
 
@@ -10,7 +10,7 @@ def show():
     password = st.text_input("Choose a password", type="password")
 
     if st.button("Register"):
-        response = requests.post(f"{BASE_API_URL}/register/", json={"username": username, "password": password})
+        response = api_client.post(f"{BASE_API_URL}/register/", json={"username": username, "password": password})
         
         if response.status_code == 200:
             st.success("Registration successful! Please log in.")
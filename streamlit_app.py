@@ -1,4 +1,6 @@
 import streamlit as st
+import api_client
+from config import BASE_API_URL
 import login
 import register
 import food_list
@@ -40,6 +42,10 @@ for tab, page_name in zip(selected_tab, available_pages):
 if user_logged_in:
     st.sidebar.success(f"👤 Logged in as **{st.session_state['username']}**")
     if st.sidebar.button("🚪 Logout"):
+        if st.session_state.get("refresh_token"):
+            api_client.post(f"{BASE_API_URL}/logout/", json={"refresh_token": st.session_state["refresh_token"]})
         st.session_state["user_id"] = None
         st.session_state["username"] = None
+        st.session_state["access_token"] = None
+        st.session_state["refresh_token"] = None
         st.rerun()
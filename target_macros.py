@@ -1,5 +1,8 @@
+import datetime
 import streamlit as st
-import requests
+import pandas as pd
+import plotly.express as px
+import api_client
 from config import BASE_API_URL
 
 # Define body fat options with labels, images, and corresponding values
@@ -39,7 +42,7 @@ def show():
 
     # Load existing target macros for this user
     existing_data = None
-    resp = requests.get(f"{BASE_API_URL}/target_macros/{user_id}")
+    resp = api_client.cached_get(f"{BASE_API_URL}/target_macros/{user_id}", user_id)
     if resp.status_code == 200:
         existing_data = resp.json()
     elif resp.status_code != 404:
@@ -142,6 +145,37 @@ def show():
         st.write(f"**Fats:** {fats_val} g/day")
         st.markdown("</div>", unsafe_allow_html=True)
 
+    # Progress vs. targets from the API's weekly/monthly rollups
+    with st.container():
+        st.markdown('<div class="bordered-box">', unsafe_allow_html=True)
+        st.subheader("Progress vs. Targets")
+        trend_period = st.radio("Average per", ["week", "month"], horizontal=True, key="trend_period")
+        # An explicit end keeps the cached rolling means from carrying over to the next day
+        trend_resp = api_client.cached_get(
+            f"{BASE_API_URL}/user_daily_macros/{user_id}/trend", user_id,
+            params={"period": trend_period, "end": datetime.date.today().isoformat()}
+        )
+        trend = trend_resp.json() if trend_resp.status_code == 200 else None
+        if trend and trend["points"]:
+            rolling_7, rolling_30 = trend["rolling"]["7_day"], trend["rolling"]["30_day"]
+            col1, col2 = st.columns(2)
+            col1.metric("7-day avg calories", f"{rolling_7['average']['calories']:.0f} kcal",
+                        f"{rolling_7['adherence']['calories']}% of target" if rolling_7["adherence"]["calories"] else None,
+                        delta_color="off")
+            col2.metric("30-day avg calories", f"{rolling_30['average']['calories']:.0f} kcal",
+                        f"{rolling_30['adherence']['calories']}% of target" if rolling_30["adherence"]["calories"] else None,
+                        delta_color="off")
+            trend_df = pd.DataFrame(
+                {"Period": point["key"], "Calories": point["average"]["calories"]} for point in trend["points"]
+            )
+            fig = px.line(trend_df, x="Period", y="Calories", markers=True, title=f"Average daily calories per {trend_period}")
+            if trend["targets"]:
+                fig.add_hline(y=trend["targets"]["calories"], line_dash="dash", annotation_text="Target")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Nothing logged or saved yet.")
+        st.markdown("</div>", unsafe_allow_html=True)
+
     # Calculate, Save and Transfer Macros
     calc_button_col, transfer_button_col = st.columns(2)
 
@@ -163,7 +197,8 @@ def show():
             payload = {"weight": weight, "height": height, "body_fat": st.session_state["selected_body_fat"], "activity_level": activity_level, "goal": goal, "tdee": round(new_tdee), "target_calories": target_cals, "protein": new_protein, "carbs": new_carbs, "fats": new_fats}
 
             save_url = f"{BASE_API_URL}/target_macros/{user_id}"
-            resp = requests.post(save_url, json=payload)
+            resp = api_client.post(save_url, json=payload)
+            api_client.invalidate(user_id)
             if resp.status_code == 200:
                 st.success("✅ Target Macros Saved/Updated!")
                 st.rerun()